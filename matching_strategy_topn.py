@@ -5,37 +5,84 @@ Returns multiple potential matches for human verification
 Uses full dataset (not chunks) for complete coverage
 """
 
-import json
 import csv
+import functools
+import hashlib
+import heapq
+import inspect
+import multiprocessing
+import os
+import pickle
 import re
 import time
 from collections import defaultdict
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+
+import numpy as np
+import orjson
+from numba import njit, prange, set_num_threads, types
+from numba.extending import intrinsic
 
 # ============================================
 # CONFIGURATION
 # ============================================
 TOP_N = 5  # Number of candidates to return per approach
 MAX_CANDIDATES = 100  # Limit candidates for performance
+DB_FILE = 'anime-offline-database-minified.json'
+DB_CACHE_DIR = 'db_cache'  # Packed columns, rebuilt when DB_FILE is newer
+CACHE_VERSION = 1
+EXPORT_WORKERS = 1  # >1 runs the export sweep in a process pool over the cache
+WORD_MASK = (1 << 64) - 1
 
 # ============================================
 # NORMALIZATION FUNCTIONS
 # ============================================
 
+SEASON_PATTERNS = [
+    r'\s+season\s+\d+', r'\s+s\d+\b', r'\s+part\s+\d+',
+    r'\s+\d+nd\s+season', r'\s+\d+rd\s+season', r'\s+\d+th\s+season',
+    r':\s*the\s+final', r'\s+final\s+season',
+    r':\s*ultra\s+romantic', r':\s*beyond\s+.*',
+]
+_SEASON_RE = re.compile('|'.join(f'(?:{p})' for p in SEASON_PATTERNS), re.IGNORECASE)
+
+class _PunctTable(dict):
+    """str.translate table mapping punctuation (non-word, non-space) to a space, filled lazily"""
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        self[codepoint] = char if char.isalnum() or char == '_' or char.isspace() else ' '
+        return self[codepoint]
+
+_PUNCT_TABLE = _PunctTable()
+
 def safe_normalize(title):
+    # Checked before the caches: lru_cache hashes its argument, so an
+    # unhashable non-string would raise TypeError instead of returning ""
     if not title or not isinstance(title, str):
         return ""
-    title = title.lower().strip()
-    title = re.sub(r'[^\w\s]', ' ', title)
-    title = re.sub(r'\s+', ' ', title)
-    return title.strip()
+    return _normalize(title)
+
+@functools.lru_cache(maxsize=None)
+def _normalize(title):
+    # Blank punctuation in one C-level pass; split/join collapses and trims whitespace
+    return ' '.join(title.lower().translate(_PUNCT_TABLE).split())
 
 def extract_tokens(title):
+    if not isinstance(title, str):
+        return ()
+    return _extract_tokens(title)
+
+@functools.lru_cache(maxsize=None)
+def _extract_tokens(title):
     common_words = {'the', 'a', 'an', 'and', 'or', 'of', 'is', 'to', 'in', 'on', 'at', 'with', 'for', 'by'}
     normalized = safe_normalize(title)
     if not normalized:
-        return []
+        return ()
     tokens = normalized.split()
-    return [t for t in tokens if t not in common_words and len(t) > 1]
+    return tuple(t for t in tokens if t not in common_words and len(t) > 1)
 
 def get_anchors(title):
     tokens = extract_tokens(title)
@@ -45,33 +92,13 @@ def get_anchors(title):
         return tokens, []
     return [tokens[0]], [tokens[-1]]
 
-def calc_overlap(set1, set2):
-    if not set1 or not set2:
-        return 0.0
-    intersection = set1 & set2
-    union = set1 | set2
-    if not union:
-        return 0.0
-    return len(intersection) / len(union)
-
 def expand_title(title):
     """Generate variations by removing season markers"""
     if not title:
         return [""]
     
     variations = [title]
-    season_patterns = [
-        r'\s+season\s+\d+', r'\s+s\d+\b', r'\s+part\s+\d+',
-        r'\s+\d+nd\s+season', r'\s+\d+rd\s+season', r'\s+\d+th\s+season',
-        r':\s*the\s+final', r'\s+final\s+season',
-        r':\s*ultra\s+romantic', r':\s*beyond\s+.*',
-    ]
-    
-    base = title
-    for pattern in season_patterns:
-        base = re.sub(pattern, '', base, flags=re.IGNORECASE)
-    
-    base = base.strip()
+    base = _SEASON_RE.sub('', title).strip()
     if base and base != title and len(base) > 3:
         variations.append(base)
     
@@ -81,109 +108,460 @@ def expand_title(title):
 # PRE-COMPUTATION
 # ============================================
 
+_TOKEN_ID = {}  # token string -> dense int id
+
+def intern(tok):
+    return _TOKEN_ID.setdefault(tok, len(_TOKEN_ID))
+
+def title_signals(title):
+    """Tokens, anchors and expanded variants for a title (ids interned)"""
+    tokens = extract_tokens(title)
+    first, last = get_anchors(title)
+    expanded_tokens = tuple(
+        frozenset(intern(t) for t in extract_tokens(v)) for v in expand_title(title) if v
+    )
+    return (
+        frozenset(intern(t) for t in tokens),
+        frozenset(intern(t) for t in first),
+        frozenset(intern(t) for t in last),
+        expanded_tokens,
+    )
+
 def precompute_entry(entry):
     title = entry.get('title', '')
     if not title:
         return None
     
-    tokens = extract_tokens(title)
-    first, last = get_anchors(title)
-    
-    entry['_tokens'] = set(tokens)
-    entry['_anchors_first'] = set(first)
-    entry['_anchors_last'] = set(last)
-    entry['_expanded'] = expand_title(title)
+    (entry['_tokens'], entry['_anchors_first'], entry['_anchors_last'],
+     entry['_expanded_tokens']) = title_signals(title)
     
     return entry
 
+class DBEntry:
+    """Offline-DB record holding only the fields the matcher reads"""
+    __slots__ = ('title', 'sources', 'type', 'status', 'is_synonym',
+                 '_tokens', '_anchors_first', '_anchors_last', '_expanded_tokens')
+    
+    def __init__(self, title, sources, type, status, is_synonym=False):
+        self.title = title
+        self.sources = sources
+        self.type = type
+        self.status = status
+        self.is_synonym = is_synonym
+    
+    def precompute(self):
+        (self._tokens, self._anchors_first, self._anchors_last,
+         self._expanded_tokens) = title_signals(self.title)
+        return self
+
+def load_db(path):
+    """Parse the offline DB into precomputed records (titles + synonyms)"""
+    db_entries = []
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+    for entry in data['data']:
+        sources = tuple(entry.get('sources', ()))
+        kind = entry.get('type', '')
+        status = entry.get('status', '')
+        if entry['title']:
+            db_entries.append(DBEntry(entry['title'], sources, kind, status).precompute())
+        
+        # Add synonyms
+        for syn in entry.get('synonyms', [])[:3]:
+            if syn:
+                db_entries.append(DBEntry(syn, sources, kind, status, is_synonym=True).precompute())
+    del data  # Release the parsed JSON tree
+    return db_entries
+
+def to_words(masks, width):
+    """Split Python int bitmasks into rows of `width` uint64 words"""
+    if width == 1:
+        return np.array(masks, dtype=np.uint64).reshape(len(masks), 1)
+    words = [[(mask >> (64 * w)) & WORD_MASK for w in range(width)] for mask in masks]
+    return np.array(words, dtype=np.uint64).reshape(len(masks), width)
+
+def encode_tokens(tokens, vocab, width):
+    """Encode a query token set as one bitmask row in a bucket's vocabulary"""
+    mask = 0
+    for tok in tokens:
+        if tok in vocab:
+            mask |= 1 << vocab[tok]
+    return to_words([mask], width)[0]
+
+def anchor_id(anchors, vocab):
+    """Anchor as an int for equality tests: bucket bit id + 1, 0 if absent"""
+    for anchor in anchors:
+        if anchor in vocab:
+            return vocab[anchor] + 1
+    return 0
+
+@dataclass
+class DBColumns:
+    """Struct-of-arrays view of a candidate bucket, one row per DB entry"""
+    rows: np.ndarray        # uint32 index into db_entries
+    vocab: dict             # token id -> bit id, local to this bucket
+    token_bits: np.ndarray  # (n, W) uint64
+    token_card: np.ndarray  # (n,) uint32
+    base_bits: np.ndarray   # (n, W) uint64, season-stripped variant
+    base_card: np.ndarray   # (n,) uint32
+    first_id: np.ndarray    # (n,) uint64, see anchor_id
+    last_id: np.ndarray     # (n,) uint64
+    title_len: np.ndarray   # (n,) int64
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    @property
+    def width(self):
+        return self.token_bits.shape[1]
+
+def pack_columns(db_entries, rows):
+    """Pack the given DB rows into uint64 bitmask columns.
+
+    Bit ids are local to the bucket: candidates are only ever compared
+    within one bucket, and a global vocabulary (~70k tokens) would need
+    over a kilobyte per row. The season-stripped variant from
+    expand_title gets its own row in `base_bits` (empty if there is none).
+    """
+    entries = [db_entries[row] for row in rows]
+    vocab = {}
+    masks, base_masks, base_card = [], [], []
+    for entry in entries:
+        mask = 0
+        for tok in entry._tokens:
+            mask |= 1 << vocab.setdefault(tok, len(vocab))
+        masks.append(mask)
+        
+        base_tokens = frozenset().union(*entry._expanded_tokens[1:])
+        mask = 0
+        for tok in base_tokens:
+            mask |= 1 << vocab.setdefault(tok, len(vocab))
+        base_masks.append(mask)
+        base_card.append(len(base_tokens))
+    width = max(1, (len(vocab) + 63) // 64)
+    return DBColumns(
+        rows=np.array(rows, dtype=np.uint32),
+        vocab=vocab,
+        token_bits=to_words(masks, width),
+        token_card=np.array([len(e._tokens) for e in entries], dtype=np.uint32),
+        base_bits=to_words(base_masks, width),
+        base_card=np.array(base_card, dtype=np.uint32),
+        first_id=np.array([anchor_id(e._anchors_first, vocab) for e in entries], dtype=np.uint64),
+        last_id=np.array([anchor_id(e._anchors_last, vocab) for e in entries], dtype=np.uint64),
+        title_len=np.array([len(e.title) for e in entries], dtype=np.int64),
+    )
+
 def build_anchor_index(db_entries):
+    """Bucket entries by first anchor.
+
+    A bucket is the posting list of its anchor token, so every candidate
+    already shares one token with the query and passes the anchor
+    threshold (0.4 for the first-anchor match plus a non-zero token
+    score). Filtering buckets further by token postings would drop
+    anchor matches, so the whole bucket is scored.
+    """
     index = defaultdict(list)
-    for entry in db_entries:
-        if '_anchors_first' in entry and entry['_anchors_first']:
-            for anchor in entry['_anchors_first']:
-                index[anchor].append(entry)
-    return index
+    for row, entry in enumerate(db_entries):
+        for anchor in entry._anchors_first:
+            index[anchor].append(row)
+    return {anchor: pack_columns(db_entries, rows) for anchor, rows in index.items()}
+
+_EMPTY_BUCKET = pack_columns([], [])
+
+def get_bucket(anchors, anchor_index):
+    """Candidate columns for a query's first anchor.
+
+    get_anchors yields at most one first anchor, so this is a single bucket
+    lookup; an unknown anchor gets the shared empty bucket.
+    """
+    for anchor in anchors:
+        if anchor in anchor_index:
+            return anchor_index[anchor]
+    return _EMPTY_BUCKET
 
 # ============================================
-# TOP-N MATCHING APPROACHES
+# DB CACHE
 # ============================================
 
-def approach_1_token_topn(csv_entry, candidate_entries, n=TOP_N):
-    """Return top N matches by token overlap"""
-    csv_tokens = csv_entry.get('_tokens', set())
-    if not csv_tokens:
-        return []
-    
-    scored = []
-    for db_entry in candidate_entries:
-        db_tokens = db_entry.get('_tokens', set())
-        if not db_tokens:
-            continue
-        
-        overlap = calc_overlap(csv_tokens, db_tokens)
-        if overlap > 0.3:  # Minimum threshold
-            scored.append((db_entry, overlap, 'token'))
+_COLUMN_ARRAYS = ('rows', 'token_card', 'base_card', 'first_id', 'last_id', 'title_len')
+_CACHE_ARRAYS = _COLUMN_ARRAYS + ('token_bits', 'base_bits', 'vocab',
+                                  'row_offsets', 'word_offsets', 'vocab_offsets')
+
+class ColumnStore(Mapping):
+    """Anchor index backed by flat, memory-mapped column arrays.
+
+    Buckets are stored back to back; a DBColumns view is sliced out (and
+    its vocabulary dict built) the first time an anchor is looked up.
+    """
+    
+    def __init__(self, arrays, anchors):
+        self.arrays = arrays
+        self.slots = {anchor: i for i, anchor in enumerate(anchors)}
+        self._buckets = {}
+    
+    def __getitem__(self, anchor):
+        if anchor not in self._buckets:
+            self._buckets[anchor] = self.bucket(self.slots[anchor])
+        return self._buckets[anchor]
     
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:n]
+    def __contains__(self, anchor):
+        return anchor in self.slots
+    
+    def __iter__(self):
+        return iter(self.slots)
+    
+    def __len__(self):
+        return len(self.slots)
+    
+    def bucket(self, i):
+        a = self.arrays
+        r0, r1 = a['row_offsets'][i:i + 2]
+        w0, w1 = a['word_offsets'][i:i + 2]
+        v0, v1 = a['vocab_offsets'][i:i + 2]
+        n = r1 - r0
+        width = (w1 - w0) // n if n else 1
+        columns = {name: np.asarray(a[name][r0:r1]) for name in _COLUMN_ARRAYS}
+        return DBColumns(
+            vocab={tok: bit for bit, tok in enumerate(a['vocab'][v0:v1].tolist())},
+            token_bits=np.asarray(a['token_bits'][w0:w1]).reshape(n, width),
+            base_bits=np.asarray(a['base_bits'][w0:w1]).reshape(n, width),
+            **columns,
+        )
 
-def approach_2_anchor_topn(csv_entry, candidate_entries, n=TOP_N):
-    """Return top N matches by anchor+scoring"""
-    csv_first = csv_entry.get('_anchors_first', set())
-    csv_last = csv_entry.get('_anchors_last', set())
-    csv_tokens = csv_entry.get('_tokens', set())
-    csv_title = csv_entry.get('title', '')
+def signal_fingerprint():
+    """Hash of the patterns and code that derive cached signals.
+
+    The cache holds the token table, packed bits and anchor ids, so any edit
+    to normalization, tokenization or packing must invalidate it.
+    """
+    sources = [repr(SEASON_PATTERNS)] + [
+        inspect.getsource(obj) for obj in (
+            _PunctTable, safe_normalize, _normalize, extract_tokens, _extract_tokens,
+            get_anchors, expand_title, title_signals, load_db, to_words, encode_tokens,
+            anchor_id, pack_columns, build_anchor_index,
+        )
+    ]
+    return hashlib.sha256('\n'.join(sources).encode('utf-8')).hexdigest()
+
+def save_db_cache(cache_dir, db_entries, anchor_index, fallback):
+    """Write packed columns as .npy files and records/vocabulary as a pickle"""
+    os.makedirs(cache_dir, exist_ok=True)
+    anchors = list(anchor_index)
+    buckets = [anchor_index[a] for a in anchors] + [fallback]
+    arrays = {name: np.concatenate([getattr(b, name) for b in buckets]) for name in _COLUMN_ARRAYS}
+    arrays['token_bits'] = np.concatenate([b.token_bits.ravel() for b in buckets])
+    arrays['base_bits'] = np.concatenate([b.base_bits.ravel() for b in buckets])
+    # vocab dicts are filled in bit order, so their keys list the tokens by bit id
+    arrays['vocab'] = np.concatenate([np.fromiter(b.vocab, dtype=np.uint32, count=len(b.vocab)) for b in buckets])
+    arrays['row_offsets'] = np.cumsum([0] + [len(b) for b in buckets])
+    arrays['word_offsets'] = np.cumsum([0] + [b.token_bits.size for b in buckets])
+    arrays['vocab_offsets'] = np.cumsum([0] + [len(b.vocab) for b in buckets])
+    for name in _CACHE_ARRAYS:
+        np.save(os.path.join(cache_dir, f'{name}.npy'), arrays[name])
     
-    scored = []
-    for db_entry in candidate_entries:
-        db_first = db_entry.get('_anchors_first', set())
-        db_last = db_entry.get('_anchors_last', set())
-        
-        first_match = bool(csv_first & db_first)
-        last_match = bool(csv_last & db_last)
-        
-        if not first_match and not last_match:
-            continue
-        
-        anchor_score = (0.4 if first_match else 0) + (0.2 if last_match else 0)
-        db_tokens = db_entry.get('_tokens', set())
-        token_score = calc_overlap(csv_tokens, db_tokens) * 0.4
-        len_ratio = min(len(csv_title), len(db_entry.get('title', ''))) / max(len(csv_title), 1) if csv_title else 0
-        len_score = len_ratio * 0.2
+    # Written last: its mtime marks the cache as complete
+    meta = {
+        'version': CACHE_VERSION,
+        'fingerprint': signal_fingerprint(),
+        'tokens': list(_TOKEN_ID),
+        'anchors': anchors,
+        'records': [(e.title, e.sources, e.type, e.status, e.is_synonym) for e in db_entries],
+    }
+    with open(os.path.join(cache_dir, 'meta.pkl'), 'wb') as f:
+        pickle.dump(meta, f, protocol=5)
+
+def load_db_cache(cache_dir, source_path):
+    """Return (db_entries, anchor_index, fallback) from cache, or None if stale"""
+    meta_path = os.path.join(cache_dir, 'meta.pkl')
+    if not os.path.exists(meta_path) or os.path.getmtime(meta_path) < os.path.getmtime(source_path):
+        return None
+    with open(meta_path, 'rb') as f:
+        meta = pickle.load(f)
+    if meta['version'] != CACHE_VERSION or meta.get('fingerprint') != signal_fingerprint():
+        return None
+    
+    arrays = {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r')
+              for name in _CACHE_ARRAYS}
+    # Token ids must match the cached vocabularies before any query is interned
+    _TOKEN_ID.clear()
+    _TOKEN_ID.update((tok, i) for i, tok in enumerate(meta['tokens']))
+    db_entries = [DBEntry(*record) for record in meta['records']]
+    anchor_index = ColumnStore(arrays, meta['anchors'])
+    return db_entries, anchor_index, anchor_index.bucket(len(meta['anchors']))
+
+# ============================================
+# SCORING KERNELS
+# ============================================
+
+@intrinsic
+def popcount64(typingctx, x):
+    """Hardware popcount (llvm.ctpop, POPCNT) for numba kernels"""
+    if not isinstance(x, types.Integer):
+        return None
+    def codegen(context, builder, signature, args):
+        return builder.ctpop(args[0])
+    return x(x), codegen
+
+@njit(cache=True)
+def jaccard(a_bits, a_card, b_bits, b_card):
+    if a_card == 0 or b_card == 0:
+        return 0.0
+    inter = 0
+    for w in range(a_bits.shape[0]):
+        inter += np.int64(popcount64(a_bits[w] & b_bits[w]))
+    return inter / (np.int64(a_card) + np.int64(b_card) - inter)
+
+@njit(cache=True, parallel=True)
+def score_candidates(cand_idx, q_first, q_last, q_bits, q_card, q_len, q_var_bits, q_var_card,
+                     db_first, db_last, db_bits, db_card, db_len, db_base_bits, db_base_card):
+    """Token, anchor and expand scores for every candidate in one pass"""
+    n = cand_idx.shape[0]
+    token_scores = np.zeros(n)
+    anchor_scores = np.zeros(n)
+    expand_scores = np.zeros(n)
+    for k in prange(n):
+        i = cand_idx[k]
+        overlap = jaccard(q_bits, q_card, db_bits[i], db_card[i])
+        token_scores[k] = overlap
         
-        total = anchor_score + token_score + len_score
+        first_match = q_first != 0 and db_first[i] == q_first
+        last_match = q_last != 0 and db_last[i] == q_last
+        if first_match or last_match:
+            anchor_score = (0.4 if first_match else 0.0) + (0.2 if last_match else 0.0)
+            token_score = overlap * 0.4
+            len_ratio = min(q_len, db_len[i]) / q_len if q_len > 0 else 0.0
+            len_score = len_ratio * 0.2
+            anchor_scores[k] = anchor_score + token_score + len_score
         
-        if total > 0.4:  # Minimum threshold
-            scored.append((db_entry, total, 'anchor'))
+        best_overlap = 0.0
+        for j in range(q_var_bits.shape[0]):
+            best_overlap = max(best_overlap,
+                               jaccard(q_var_bits[j], q_var_card[j], db_bits[i], db_card[i]),
+                               jaccard(q_var_bits[j], q_var_card[j], db_base_bits[i], db_base_card[i]))
+        expand_scores[k] = best_overlap
+    return token_scores, anchor_scores, expand_scores
+
+def score_all(csv_entry, cols, cand_idx):
+    """Score a CSV entry against the candidate rows of a bucket"""
+    vocab, width = cols.vocab, cols.width
+    csv_tokens = csv_entry.get('_tokens', set())
+    csv_vars = csv_entry.get('_expanded_tokens', ())
+    return score_candidates(
+        cand_idx,
+        anchor_id(csv_entry.get('_anchors_first', set()), vocab),
+        anchor_id(csv_entry.get('_anchors_last', set()), vocab),
+        encode_tokens(csv_tokens, vocab, width),
+        len(csv_tokens),
+        len(csv_entry.get('title', '')),
+        np.array([encode_tokens(v, vocab, width) for v in csv_vars], dtype=np.uint64).reshape(len(csv_vars), width),
+        np.array([len(v) for v in csv_vars], dtype=np.uint32),
+        cols.first_id, cols.last_id, cols.token_bits, cols.token_card,
+        cols.title_len, cols.base_bits, cols.base_card,
+    )
+
+# ============================================
+# TOP-N MATCHING
+# ============================================
+
+# (method, minimum threshold) in score_all's output order
+APPROACHES = (('token', 0.3), ('anchor', 0.4), ('expand', 0.5))
+
+def top_n_indices(scores, threshold, n):
+    """Indices of the n best scores above threshold, ties in candidate order"""
+    idx = np.flatnonzero(scores > threshold)
+    if len(idx) > n:
+        part = np.argpartition(-scores[idx], n - 1)[:n]
+        idx = idx[scores[idx] >= scores[idx[part]].min()]
+    order = np.argsort(-scores[idx], kind='stable')
+    return idx[order[:n]]
+
+def match_topn(csv_entry, cols, cand_idx, n=TOP_N):
+    """Return top N (db row, score, method) per approach from one scoring pass"""
+    if len(cand_idx) == 0:
+        return [[] for _ in APPROACHES]
     
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:n]
+    rows = cols.rows[cand_idx]
+    results = []
+    for scores, (method, threshold) in zip(score_all(csv_entry, cols, cand_idx), APPROACHES):
+        top = top_n_indices(scores, threshold, n)
+        results.append([(int(rows[k]), float(scores[k]), method) for k in top])
+    return results
+
+# ============================================
+# EXPORT SWEEP
+# ============================================
+
+_SHARED_DB = None  # (db_entries, anchor_index, fallback) in pool workers
 
-def approach_3_expand_topn(csv_entry, candidate_entries, n=TOP_N):
-    """Return top N matches by expanded title matching"""
-    csv_expanded = csv_entry.get('_expanded', [csv_entry.get('title', '')])
+def process_entry(csv_entry, db_entries, anchor_index, fallback):
+    """Match one CSV entry and summarize its best candidate for export"""
+    csv_title = csv_entry['title']
+    csv_first = csv_entry.get('_anchors_first', set())
     
-    scored = []
-    for db_entry in candidate_entries:
-        db_expanded = db_entry.get('_expanded', [db_entry.get('title', '')])
-        
-        best_overlap = 0
-        for csv_var in csv_expanded:
-            csv_tokens = set(extract_tokens(csv_var))
-            if not csv_tokens:
-                continue
-            for db_var in db_expanded:
-                db_tokens = set(extract_tokens(db_var))
-                if not db_tokens:
-                    continue
-                overlap = calc_overlap(csv_tokens, db_tokens)
-                best_overlap = max(best_overlap, overlap)
-        
-        if best_overlap > 0.5:  # Minimum threshold
-            scored.append((db_entry, best_overlap, 'expand'))
+    if csv_first:
+        cols = get_bucket(csv_first, anchor_index)
+    else:
+        cols = fallback
+    cand_idx = np.arange(len(cols))
+    
+    a1_results, a2_results, a3_results = match_topn(csv_entry, cols, cand_idx, n=3)
+    
+    # Combine all candidates, deduplicate, sort by score
+    all_candidates = {}
+    for row, score, method in (a1_results + a2_results + a3_results):
+        match = db_entries[row]
+        title = match.title
+        if title not in all_candidates or all_candidates[title]['score'] < score:
+            all_candidates[title] = {
+                'title': title,
+                'score': score,
+                'method': method,
+                'sources': match.sources
+            }
+    
+    # Sort by score, take top 5
+    top_candidates = heapq.nlargest(5, all_candidates.values(), key=itemgetter('score'))
     
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:n]
+    # Extract MAL and AniList URLs if available
+    mal_url = ''
+    anilist_url = ''
+    if top_candidates:
+        for src in top_candidates[0].get('sources', []):
+            if 'myanimelist' in src:
+                mal_url = src
+            elif 'anilist' in src:
+                anilist_url = src
+    
+    return {
+        'csv_title': csv_title,
+        'csv_type': csv_entry.get('type', ''),
+        'top_candidate': top_candidates[0]['title'] if top_candidates else '',
+        'top_score': top_candidates[0]['score'] if top_candidates else 0,
+        'top_method': top_candidates[0]['method'] if top_candidates else '',
+        'mal_url': mal_url,
+        'anilist_url': anilist_url,
+        'candidate_count': len(top_candidates),
+    }
+
+def _load_shared_db(cache_dir):
+    global _SHARED_DB
+    # The pool already uses every core; a parallel kernel per worker would oversubscribe
+    set_num_threads(1)
+    _SHARED_DB = load_db_cache(cache_dir, DB_FILE)
+    if _SHARED_DB is None:
+        raise RuntimeError(f"Export worker found no valid DB cache in {cache_dir}/ "
+                           f"(removed or rewritten since the main process saved it)")
+
+def _process_shared(csv_entry):
+    return process_entry(csv_entry, *_SHARED_DB)
+
+def _collect(exported, total):
+    full_results = []
+    for idx, result in enumerate(exported):
+        full_results.append(result)
+        if (idx + 1) % 50 == 0:
+            print(f"  Processed {idx + 1}/{total}...")
+    return full_results
 
 # ============================================
 # MAIN EXECUTION
@@ -198,58 +576,45 @@ def main():
     print("\n📥 Loading CSV entries...")
     csv_entries = []
     with open('animelist_enriched4.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader)
+        i_url, i_title, i_type, i_notes = (header.index(c) for c in ('MAL_URL', 'Title', 'Type', 'Notes'))
         for row in reader:
-            if row['MAL_URL'] == 'FAILED_LOOKUP':
+            if row[i_url] == 'FAILED_LOOKUP':
                 csv_entries.append({
-                    'title': row['Title'],
-                    'type': row['Type'],
-                    'notes': row['Notes']
+                    'title': row[i_title],
+                    'type': row[i_type],
+                    'notes': row[i_notes]
                 })
     
     print(f"   Found {len(csv_entries)} entries needing enrichment")
     
-    # Precompute CSV entries
-    for entry in csv_entries:
-        precompute_entry(entry)
-    
     # Phase 2: Load FULL dataset (not chunks)
     print("\n📥 Loading FULL offline database (58MB)...")
     start = time.time()
     
-    db_entries = []
-    with open('anime-offline-database-minified.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        for entry in data['data']:
-            db_entry = {
-                'title': entry['title'],
-                'sources': entry.get('sources', []),
-                'type': entry.get('type', ''),
-                'status': entry.get('status', ''),
-            }
-            if precompute_entry(db_entry):
-                db_entries.append(db_entry)
-            
-            # Add synonyms
-            for syn in entry.get('synonyms', [])[:3]:
-                syn_entry = {
-                    'title': syn,
-                    'sources': entry.get('sources', []),
-                    'type': entry.get('type', ''),
-                    'status': entry.get('status', ''),
-                    'is_synonym': True
-                }
-                if precompute_entry(syn_entry):
-                    db_entries.append(syn_entry)
+    cached = load_db_cache(DB_CACHE_DIR, DB_FILE)
+    if cached:
+        db_entries, anchor_index, fallback = cached
+        print(f"   Using packed cache in {DB_CACHE_DIR}/")
+    else:
+        db_entries = load_db(DB_FILE)
     
     load_time = time.time() - start
     print(f"   ✓ Loaded {len(db_entries)} entries in {load_time:.2f}s")
     
     # Phase 3: Build index
     print("\n🔧 Building anchor index...")
-    anchor_index = build_anchor_index(db_entries)
+    if not cached:
+        anchor_index = build_anchor_index(db_entries)
+        fallback = pack_columns(db_entries, list(range(min(MAX_CANDIDATES, len(db_entries)))))
+        save_db_cache(DB_CACHE_DIR, db_entries, anchor_index, fallback)
     print(f"   Index: {len(anchor_index)} anchors, ~{len(db_entries)//len(anchor_index)} entries/anchor")
     
+    # Precompute CSV entries (after the DB so token ids match the index)
+    for entry in csv_entries:
+        precompute_entry(entry)
+    
     # Phase 4: Match first 20 entries with full candidate visibility
     test_entries = csv_entries[:20]
     print(f"\n🧪 Matching {len(test_entries)} entries (showing top {TOP_N} candidates each)...")
@@ -263,47 +628,43 @@ def main():
         
         # Get candidates via index
         if csv_first:
-            candidates = []
-            for anchor in csv_first:
-                candidates.extend(anchor_index.get(anchor, []))
-            candidates = list({id(c): c for c in candidates}.values())
+            cols = get_bucket(csv_first, anchor_index)
         else:
-            candidates = db_entries[:MAX_CANDIDATES]  # Limit for no-anchor case
+            cols = fallback  # Limit for no-anchor case
+        cand_idx = np.arange(len(cols))
         
         # Get top N from each approach
-        a1_results = approach_1_token_topn(csv_entry, candidates)
-        a2_results = approach_2_anchor_topn(csv_entry, candidates)
-        a3_results = approach_3_expand_topn(csv_entry, candidates)
+        a1_results, a2_results, a3_results = match_topn(csv_entry, cols, cand_idx)
         
         # Print results
         print(f"\n[{idx+1}] '{csv_title}'")
-        print(f"    Type: {csv_entry.get('type', 'N/A')} | Candidates checked: {len(candidates)}")
-        print(f"    Tokens: {list(csv_entry.get('_tokens', []))[:5]}")
+        print(f"    Type: {csv_entry.get('type', 'N/A')} | Candidates checked: {len(cols)}")
+        print(f"    Tokens: {list(dict.fromkeys(extract_tokens(csv_title)))[:5]}")
         
         if a1_results:
             print(f"    ├─ Token Match:")
-            for match, score, _ in a1_results[:3]:
+            for row, score, _ in a1_results[:3]:
                 marker = " ✓" if score == 1.0 else ""
-                print(f"    │  • {match['title'][:50]:<50} ({score:.2f}){marker}")
+                print(f"    │  • {db_entries[row].title[:50]:<50} ({score:.2f}){marker}")
         
         if a2_results:
             print(f"    ├─ Anchor Match:")
-            for match, score, _ in a2_results[:3]:
+            for row, score, _ in a2_results[:3]:
                 marker = " ✓" if score >= 0.8 else ""
-                print(f"    │  • {match['title'][:50]:<50} ({score:.2f}){marker}")
+                print(f"    │  • {db_entries[row].title[:50]:<50} ({score:.2f}){marker}")
         
         if a3_results:
             print(f"    └─ Expand Match:")
-            for match, score, _ in a3_results[:3]:
+            for row, score, _ in a3_results[:3]:
                 marker = " ✓" if score >= 0.8 else ""
-                print(f"       • {match['title'][:50]:<50} ({score:.2f}){marker}")
+                print(f"       • {db_entries[row].title[:50]:<50} ({score:.2f}){marker}")
         
         if not a1_results and not a2_results and not a3_results:
             print(f"    └─ ❌ NO MATCHES FOUND")
         
         results.append({
             'csv_title': csv_title,
-            'candidates': len(candidates),
+            'candidates': len(cols),
             'a1_count': len(a1_results),
             'a2_count': len(a2_results),
             'a3_count': len(a3_results),
@@ -326,65 +687,21 @@ def main():
     print(f"🚀 Processing ALL {len(csv_entries)} entries for export...")
     print("=" * 80)
     
-    full_results = []
-    for idx, csv_entry in enumerate(csv_entries):
-        csv_title = csv_entry['title']
-        csv_first = csv_entry.get('_anchors_first', set())
-        
-        if csv_first:
-            candidates = []
-            for anchor in csv_first:
-                candidates.extend(anchor_index.get(anchor, []))
-            candidates = list({id(c): c for c in candidates}.values())
-        else:
-            candidates = db_entries[:MAX_CANDIDATES]
-        
-        a1_results = approach_1_token_topn(csv_entry, candidates, n=3)
-        a2_results = approach_2_anchor_topn(csv_entry, candidates, n=3)
-        a3_results = approach_3_expand_topn(csv_entry, candidates, n=3)
-        
-        # Combine all candidates, deduplicate, sort by score
-        all_candidates = {}
-        for match, score, method in (a1_results + a2_results + a3_results):
-            title = match['title']
-            if title not in all_candidates or all_candidates[title]['score'] < score:
-                all_candidates[title] = {
-                    'title': title,
-                    'score': score,
-                    'method': method,
-                    'sources': match.get('sources', [])
-                }
-        
-        # Sort by score, take top 5
-        top_candidates = sorted(all_candidates.values(), key=lambda x: x['score'], reverse=True)[:5]
-        
-        # Extract MAL and AniList URLs if available
-        mal_url = ''
-        anilist_url = ''
-        if top_candidates:
-            for src in top_candidates[0].get('sources', []):
-                if 'myanimelist' in src:
-                    mal_url = src
-                elif 'anilist' in src:
-                    anilist_url = src
-        
-        full_results.append({
-            'csv_title': csv_title,
-            'csv_type': csv_entry.get('type', ''),
-            'top_candidate': top_candidates[0]['title'] if top_candidates else '',
-            'top_score': top_candidates[0]['score'] if top_candidates else 0,
-            'top_method': top_candidates[0]['method'] if top_candidates else '',
-            'mal_url': mal_url,
-            'anilist_url': anilist_url,
-            'candidate_count': len(top_candidates),
-        })
-        
-        if (idx + 1) % 50 == 0:
-            print(f"  Processed {idx + 1}/{len(csv_entries)}...")
+    if EXPORT_WORKERS > 1:
+        # Workers map the packed cache themselves instead of unpickling the DB
+        with ProcessPoolExecutor(max_workers=EXPORT_WORKERS,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_load_shared_db,
+                                 initargs=(DB_CACHE_DIR,)) as executor:
+            exported = executor.map(_process_shared, csv_entries, chunksize=16)
+            full_results = _collect(exported, len(csv_entries))
+    else:
+        exported = (process_entry(e, db_entries, anchor_index, fallback) for e in csv_entries)
+        full_results = _collect(exported, len(csv_entries))
     
     # Export to CSV
     output_file = 'matching_candidates_all.csv'
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
         writer = csv.DictWriter(f, fieldnames=[
             'csv_title', 'csv_type', 'top_candidate', 'top_score', 
             'top_method', 'mal_url', 'anilist_url', 'candidate_count'
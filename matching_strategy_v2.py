@@ -4,12 +4,20 @@ BULLETPROOFED Progressive Cascade Matching Strategy v2
 Incorporates: Performance indexing, Data integrity checks, Debug visibility
 """
 
-import json
+import bisect
 import csv
+import functools
+import multiprocessing
+import os
+import pickle
 import re
 import time
 import random
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import orjson
 
 # ============================================
 # CONFIGURATION
@@ -17,28 +25,66 @@ from collections import defaultdict
 TEST_SIZE = 30  # Number of entries to test
 CHUNKS_TO_LOAD = 3  # Start with 3 chunks (~12k entries)
 CONFIDENCE_THRESHOLD = 0.7  # Flag matches below this for review
+MATCH_WORKERS = 1  # >1 runs Phase 4 in a process pool (worth it for large TEST_SIZE)
+MAX_FALLBACK_BUCKETS = 8  # Prefix-neighbour buckets tried when a first word isn't indexed
+CHUNK_CACHE = 'chunks_cache.pkl'  # Parsed Phase 2 records, rebuilt when a chunk is newer
+CHUNK_CACHE_VERSION = 1
 
 # ============================================
 # NORMALIZATION FUNCTIONS (with safety checks)
 # ============================================
 
+# More comprehensive season patterns (case-insensitive)
+SEASON_PATTERNS = [
+    (r'\s+season\s+\d+', ' season marker'),
+    (r'\s+s\d+\b', ' s marker'),
+    (r'\s+part\s+\d+', ' part marker'),
+    (r'\s+\d+nd\s+season', ' nd season'),
+    (r'\s+\d+rd\s+season', ' rd season'),
+    (r'\s+\d+th\s+season', ' th season'),
+    (r':\s*the\s+final', ' final season'),
+    (r'\s+final\s+season', ' final season'),
+    (r':\s*ultra\s+romantic', ' subtitle'),
+    (r':\s*beyond\s+.*', ' subtitle'),
+]
+_SEASON_RE = re.compile('|'.join(f'(?:{p})' for p, _ in SEASON_PATTERNS), re.IGNORECASE)
+
+class _PunctTable(dict):
+    """str.translate table mapping punctuation (non-word, non-space) to a space, filled lazily"""
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        self[codepoint] = char if char.isalnum() or char == '_' or char.isspace() else ' '
+        return self[codepoint]
+
+_PUNCT_TABLE = _PunctTable()
+
 def safe_normalize(title):
     """Base normalization with null safety"""
+    # Checked before the caches: lru_cache hashes its argument, so an
+    # unhashable non-string would raise TypeError instead of returning ""
     if not title or not isinstance(title, str):
         return ""
-    title = title.lower().strip()
-    title = re.sub(r'[^\w\s]', ' ', title)
-    title = re.sub(r'\s+', ' ', title)
-    return title.strip()
+    return _normalize(title)
+
+@functools.lru_cache(maxsize=None)
+def _normalize(title):
+    # Blank punctuation in one C-level pass; split/join collapses and trims whitespace
+    return ' '.join(title.lower().translate(_PUNCT_TABLE).split())
 
 def extract_tokens(title):
     """Split into word tokens, remove common words"""
+    if not isinstance(title, str):
+        return ()
+    return _extract_tokens(title)
+
+@functools.lru_cache(maxsize=None)
+def _extract_tokens(title):
     common_words = {'the', 'a', 'an', 'and', 'or', 'of', 'is', 'to', 'in', 'on', 'at', 'with', 'for'}
     normalized = safe_normalize(title)
     if not normalized:
-        return []
+        return ()
     tokens = normalized.split()
-    return [t for t in tokens if t not in common_words and len(t) > 1]
+    return tuple(t for t in tokens if t not in common_words and len(t) > 1)
 
 def get_anchors(title):
     """Get first and last meaningful word"""
@@ -51,20 +97,26 @@ def get_anchors(title):
 
 def ngrams_safe(title, n=3):
     """Generate character n-grams with safety"""
+    if not isinstance(title, str):
+        return frozenset()
+    return _ngrams(title, n)
+
+@functools.lru_cache(maxsize=None)
+def _ngrams(title, n):
     text = safe_normalize(title).replace(' ', '')
     if len(text) < n:
-        return set()
-    return set(text[i:i+n] for i in range(len(text)-n+1))
+        return frozenset()
+    return frozenset(text[i:i+n] for i in range(len(text)-n+1))
 
 def calc_overlap(set1, set2):
     """Calculate overlap percentage with zero-division protection"""
     if not set1 or not set2:
         return 0.0
-    intersection = set1 & set2
-    union = set1 | set2
-    if not union:
+    inter = len(set1 & set2)
+    if inter == 0:
         return 0.0
-    return len(intersection) / len(union)
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, no need to build the union set
+    return inter / (len(set1) + len(set2) - inter)
 
 def expand_title(title):
     """Generate variations with improved season detection"""
@@ -73,25 +125,8 @@ def expand_title(title):
     
     variations = [title]
     
-    # More comprehensive season patterns (case-insensitive)
-    season_patterns = [
-        (r'\s+season\s+\d+', ' season marker'),
-        (r'\s+s\d+\b', ' s marker'),
-        (r'\s+part\s+\d+', ' part marker'),
-        (r'\s+\d+nd\s+season', ' nd season'),
-        (r'\s+\d+rd\s+season', ' rd season'),
-        (r'\s+\d+th\s+season', ' th season'),
-        (r':\s*the\s+final', ' final season'),
-        (r'\s+final\s+season', ' final season'),
-        (r':\s*ultra\s+romantic', ' subtitle'),
-        (r':\s*beyond\s+.*', ' subtitle'),
-    ]
-    
-    base = title
-    for pattern, _ in season_patterns:
-        base = re.sub(pattern, '', base, flags=re.IGNORECASE)
-    
-    base = base.strip()
+    # Single pass over all season markers
+    base = _SEASON_RE.sub('', title).strip()
     if base and base != title and len(base) > 3:
         variations.append(base)
     
@@ -101,51 +136,134 @@ def expand_title(title):
 # PRE-COMPUTATION & INDEXING
 # ============================================
 
+class Entry:
+    """CSV row or DB title/synonym with its precomputed matching signals"""
+    __slots__ = ('title', 'sources', 'type', 'notes',
+                 '_tokens', '_anchors_first', '_anchors_last', '_expanded_tokens')
+    
+    def __init__(self, title, sources=(), type='', notes=''):
+        self.title = title
+        self.sources = sources
+        self.type = type
+        self.notes = notes
+        self._tokens = frozenset()
+        self._anchors_first = frozenset()
+        self._anchors_last = frozenset()
+        self._expanded_tokens = ()
+
 def precompute_entry(entry):
-    """Pre-compute all matching signals for a DB entry"""
-    title = entry.get('title', '')
+    """Pre-compute all matching signals for an entry"""
+    title = entry.title
     if not title:
         return None
     
     tokens = extract_tokens(title)
     first, last = get_anchors(title)
     
-    entry['_tokens'] = set(tokens)
-    entry['_anchors_first'] = set(first)
-    entry['_anchors_last'] = set(last)
-    entry['_3grams'] = ngrams_safe(title, 3)
-    entry['_expanded'] = expand_title(title)
+    entry._tokens = frozenset(tokens)
+    entry._anchors_first = frozenset(first)
+    entry._anchors_last = frozenset(last)
+    # Token sets of the original and season-stripped title, empty ones dropped
+    entry._expanded_tokens = tuple(
+        var_tokens for var_tokens in (frozenset(extract_tokens(v)) for v in expand_title(title)) if var_tokens
+    )
     
     return entry
 
+def chunk_path(i):
+    return f'chunks/chunk-0{i}.json'
+
+def load_chunks(n_chunks):
+    """Parse the first n_chunks offline DB chunks into precomputed entries (titles + synonyms)"""
+    db_entries = []
+    for i in range(n_chunks):
+        with open(chunk_path(i), 'rb') as f:
+            data = orjson.loads(f.read())
+            for entry in data['data']:
+                db_entry = Entry(entry['title'], entry.get('sources', []), entry.get('type', ''))
+                if precompute_entry(db_entry):
+                    db_entries.append(db_entry)
+                
+                # Add synonyms
+                for syn in entry.get('synonyms', [])[:3]:  # Limit synonyms
+                    syn_entry = Entry(syn, entry.get('sources', []), entry.get('type', ''))
+                    if precompute_entry(syn_entry):
+                        db_entries.append(syn_entry)
+        log_progress(i + 1, n_chunks, "Chunks")
+    return db_entries
+
+def save_chunk_cache(path, n_chunks, db_entries):
+    # Raw fields only, as plain tuples: signals are recomputed on load so
+    # edits to the normalization code always apply to the DB side too
+    records = [(e.title, e.sources, e.type) for e in db_entries]
+    with open(path, 'wb') as f:
+        pickle.dump({'version': CHUNK_CACHE_VERSION, 'chunks': n_chunks, 'records': records}, f, protocol=5)
+
+def load_chunk_cache(path, n_chunks):
+    """Return entries rebuilt from cached chunk records, or None if missing or stale"""
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    if any(os.path.getmtime(chunk_path(i)) > mtime for i in range(n_chunks)):
+        return None
+    with open(path, 'rb') as f:
+        cached = pickle.load(f)
+    if cached.get('version') != CHUNK_CACHE_VERSION or cached.get('chunks') != n_chunks:
+        return None
+    return [precompute_entry(Entry(*record)) for record in cached['records']]
+
+class AnchorIndex(dict):
+    """First-anchor buckets plus sorted keys for prefix-neighbour lookups"""
+    def __init__(self, buckets):
+        super().__init__(buckets)
+        self.sorted_keys = sorted(self)
+    
+    def near(self, anchor, limit=MAX_FALLBACK_BUCKETS):
+        """Buckets whose key starts with anchor minus its last character"""
+        prefix = anchor[:max(1, len(anchor) - 1)]
+        keys = self.sorted_keys
+        buckets = []
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and len(buckets) < limit and keys[i].startswith(prefix):
+            buckets.append(self[keys[i]])
+            i += 1
+        return buckets
+
 def build_anchor_index(db_entries):
     """Build index mapping first anchor word to entries"""
     index = defaultdict(list)
     for entry in db_entries:
-        if '_anchors_first' in entry and entry['_anchors_first']:
-            for anchor in entry['_anchors_first']:
+        if entry._anchors_first:
+            for anchor in entry._anchors_first:
                 index[anchor].append(entry)
-    return index
+    # Buckets are only iterated from here on; freeze them as tuples
+    return AnchorIndex({anchor: tuple(bucket) for anchor, bucket in index.items()})
 
 # ============================================
 # MATCHING APPROACHES (optimized versions)
 # ============================================
 
-def approach_1_token(csv_entry, candidate_entries):
-    """Token overlap matching - optimized with precomputed data"""
-    csv_tokens = csv_entry.get('_tokens', set())
+def approach_1_token(csv_entry, candidate_entries, score_floor=0.5):
+    """Token overlap matching, skipping candidates that can't reach score_floor"""
+    csv_tokens = csv_entry._tokens
     if not csv_tokens:
         return None, 0, 0
+    n_csv = len(csv_tokens)
     
     best = None
     best_score = 0
     best_pass = 0
     
     for db_entry in candidate_entries:
-        db_tokens = db_entry.get('_tokens', set())
+        db_tokens = db_entry._tokens
         if not db_tokens:
             continue
         
+        # Jaccard can't exceed min/max of the set sizes
+        n_db = len(db_tokens)
+        if min(n_csv, n_db) / max(n_csv, n_db) < score_floor:
+            continue
+        
         overlap = calc_overlap(csv_tokens, db_tokens)
         
         # Pass 1: Exact token set match
@@ -164,11 +282,12 @@ def approach_1_token(csv_entry, candidate_entries):
 
 def approach_2_anchor_score(csv_entry, candidate_entries):
     """Weighted anchor-first scoring"""
-    csv_first = csv_entry.get('_anchors_first', set())
-    csv_last = csv_entry.get('_anchors_last', set())
-    csv_tokens = csv_entry.get('_tokens', set())
-    csv_3grams = csv_entry.get('_3grams', set())
-    csv_title = csv_entry.get('title', '')
+    csv_first = csv_entry._anchors_first
+    csv_last = csv_entry._anchors_last
+    csv_tokens = csv_entry._tokens
+    csv_title = csv_entry.title
+    # Trigram sets are built lazily on first comparison (ngrams_safe is memoized)
+    csv_3grams = ngrams_safe(csv_title, 3)
     
     if not csv_first and not csv_last:
         return None, 0, 0
@@ -178,8 +297,8 @@ def approach_2_anchor_score(csv_entry, candidate_entries):
     best_pass = 0
     
     for db_entry in candidate_entries:
-        db_first = db_entry.get('_anchors_first', set())
-        db_last = db_entry.get('_anchors_last', set())
+        db_first = db_entry._anchors_first
+        db_last = db_entry._anchors_last
         
         # Must share at least one anchor
         first_match = bool(csv_first & db_first)
@@ -191,13 +310,12 @@ def approach_2_anchor_score(csv_entry, candidate_entries):
         # Calculate weighted score
         anchor_score = (0.4 if first_match else 0) + (0.2 if last_match else 0)
         
-        db_tokens = db_entry.get('_tokens', set())
+        db_tokens = db_entry._tokens
         token_score = calc_overlap(csv_tokens, db_tokens) * 0.3
         
-        db_3grams = db_entry.get('_3grams', set())
-        ngram_score = calc_overlap(csv_3grams, db_3grams) * 0.2
+        ngram_score = calc_overlap(csv_3grams, ngrams_safe(db_entry.title, 3)) * 0.2
         
-        len_ratio = min(len(csv_title), len(db_entry.get('title', ''))) / \
+        len_ratio = min(len(csv_title), len(db_entry.title)) / \
                     max(len(csv_title), 1) if csv_title else 0
         len_score = len_ratio * 0.1
         
@@ -217,26 +335,18 @@ def approach_2_anchor_score(csv_entry, candidate_entries):
 
 def approach_3_expanded(csv_entry, candidate_entries):
     """Synonym-aware with expanded titles"""
-    csv_expanded = csv_entry.get('_expanded', [csv_entry.get('title', '')])
-    csv_tokens = csv_entry.get('_tokens', set())
+    csv_expanded = csv_entry._expanded_tokens
+    csv_tokens = csv_entry._tokens
     
     best = None
     best_score = 0
     best_pass = 0
     
     for db_entry in candidate_entries:
-        db_expanded = db_entry.get('_expanded', [db_entry.get('title', '')])
+        db_expanded = db_entry._expanded_tokens
         
-        for csv_var in csv_expanded:
-            csv_var_tokens = set(extract_tokens(csv_var))
-            if not csv_var_tokens:
-                continue
-                
-            for db_var in db_expanded:
-                db_var_tokens = set(extract_tokens(db_var))
-                if not db_var_tokens:
-                    continue
-                
+        for csv_var_tokens in csv_expanded:
+            for db_var_tokens in db_expanded:
                 # Exact match on expanded
                 if csv_var_tokens == db_var_tokens:
                     return db_entry, 1, 1.0
@@ -260,6 +370,74 @@ def approach_3_expanded(csv_entry, candidate_entries):
 # MAIN EXECUTION
 # ============================================
 
+# One flat record per CSV entry: (match title, pass, score) for each approach
+Result = namedtuple('Result', 'csv_title csv_type n_cands m1 p1 s1 m2 p2 s2 m3 p3 s3')
+
+_WORKER_DB = None  # (db_entries, anchor_index) in pool workers
+
+def match_entry(csv_entry, db_entries, anchor_index):
+    """Run all three approaches for one CSV entry and return its result record"""
+    csv_title = csv_entry.title
+    csv_first = csv_entry._anchors_first
+    
+    # Get candidate pool from index (or full DB if no anchor)
+    if csv_first is None:
+        candidates = db_entries
+    else:
+        buckets = [anchor_index[a] for a in csv_first if a in anchor_index]
+        if not buckets:
+            # First word not indexed (e.g. a typo): fall back to prefix neighbours
+            buckets = [b for a in csv_first for b in anchor_index.near(a)]
+        if len(buckets) == 1:
+            candidates = buckets[0]  # One bucket, no duplicates
+        else:
+            # Deduplicate by identity while merging buckets
+            seen = set()
+            candidates = []
+            for bucket in buckets:
+                for c in bucket:
+                    if id(c) not in seen:
+                        seen.add(id(c))
+                        candidates.append(c)
+    
+    if not candidates:
+        # Index miss with no prefix neighbours: every approach would come back empty
+        return Result(csv_title, csv_entry.type, 0, None, 0, 0, None, 0, 0, None, 0, 0)
+    
+    # Try all three approaches
+    match1, pass1, score1 = approach_1_token(csv_entry, candidates)
+    match2, pass2, score2 = approach_2_anchor_score(csv_entry, candidates)
+    match3, pass3, score3 = approach_3_expanded(csv_entry, candidates)
+    
+    return Result(
+        csv_title, csv_entry.type, len(candidates),
+        match1.title if match1 else None, pass1, score1,
+        match2.title if match2 else None, pass2, score2,
+        match3.title if match3 else None, pass3, score3,
+    )
+
+def _init_worker(db_entries, anchor_index):
+    global _WORKER_DB
+    _WORKER_DB = (db_entries, anchor_index)
+
+def _match_one(csv_entry):
+    return match_entry(csv_entry, *_WORKER_DB)
+
+def _collect(matched, total, start_time):
+    results = []
+    # Report at every multiple of total // 5, compared directly instead of by modulo
+    stride = max(1, total // 5)
+    checkpoints = iter(range(stride, total + 1, stride))
+    next_checkpoint = next(checkpoints, None)
+    for idx, result in enumerate(matched, 1):
+        results.append(result)
+        if idx == next_checkpoint:
+            elapsed = time.time() - start_time
+            rate = idx / elapsed
+            print(f"   Processed {idx}/{total} ({rate:.1f} entries/sec)")
+            next_checkpoint = next(checkpoints, None)
+    return results
+
 def log_progress(current, total, label=""):
     """Print progress every 10%"""
     if total == 0:
@@ -278,14 +456,12 @@ def main():
     print("\n📥 PHASE 1: Loading CSV entries...")
     csv_entries = []
     with open('animelist_enriched4.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader)
+        i_url, i_title, i_type, i_notes = (header.index(c) for c in ('MAL_URL', 'Title', 'Type', 'Notes'))
         for row in reader:
-            if row['MAL_URL'] == 'FAILED_LOOKUP':
-                csv_entries.append({
-                    'title': row['Title'],
-                    'type': row['Type'],
-                    'notes': row['Notes']
-                })
+            if row[i_url] == 'FAILED_LOOKUP':
+                csv_entries.append(Entry(row[i_title], type=row[i_type], notes=row[i_notes]))
     
     print(f"   Found {len(csv_entries)} entries needing enrichment")
     
@@ -293,33 +469,17 @@ def main():
     print("   Precomputing CSV entry signals...")
     for entry in csv_entries:
         precompute_entry(entry)
+        # None marks "no anchor" so the matching loop needs no default set
+        entry._anchors_first = entry._anchors_first or None
     
     # Phase 2: Load DB
     print(f"\n📥 PHASE 2: Loading {CHUNKS_TO_LOAD} offline DB chunks...")
-    db_entries = []
-    for i in range(CHUNKS_TO_LOAD):
-        with open(f'chunks/chunk-0{i}.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            for entry in data['data']:
-                db_entry = {
-                    'title': entry['title'],
-                    'sources': entry.get('sources', []),
-                    'type': entry.get('type', ''),
-                }
-                if precompute_entry(db_entry):
-                    db_entries.append(db_entry)
-                
-                # Add synonyms
-                for syn in entry.get('synonyms', [])[:3]:  # Limit synonyms
-                    syn_entry = {
-                        'title': syn,
-                        'sources': entry.get('sources', []),
-                        'type': entry.get('type', ''),
-                        'is_synonym': True
-                    }
-                    if precompute_entry(syn_entry):
-                        db_entries.append(syn_entry)
-        log_progress(i + 1, CHUNKS_TO_LOAD, "Chunks")
+    db_entries = load_chunk_cache(CHUNK_CACHE, CHUNKS_TO_LOAD)
+    if db_entries is not None:
+        print(f"   Using parsed chunk cache {CHUNK_CACHE}")
+    else:
+        db_entries = load_chunks(CHUNKS_TO_LOAD)
+        save_chunk_cache(CHUNK_CACHE, CHUNKS_TO_LOAD, db_entries)
     
     print(f"   Loaded {len(db_entries)} DB entries (with synonyms)")
     
@@ -334,43 +494,20 @@ def main():
     print(f"\n🧪 PHASE 4: Testing on {len(test_entries)} entries...")
     print("-" * 80)
     
-    results = []
     start_time = time.time()
     
-    for idx, csv_entry in enumerate(test_entries):
-        csv_title = csv_entry['title']
-        csv_first = csv_entry.get('_anchors_first', set())
-        
-        # Get candidate pool from index (or full DB if no anchor)
-        if csv_first:
-            candidates = []
-            for anchor in csv_first:
-                candidates.extend(anchor_index.get(anchor, []))
-            candidates = list({id(c): c for c in candidates}.values())  # Deduplicate
-        else:
-            candidates = db_entries
-        
-        # Try all three approaches
-        match1, pass1, score1 = approach_1_token(csv_entry, candidates)
-        match2, pass2, score2 = approach_2_anchor_score(csv_entry, candidates)
-        match3, pass3, score3 = approach_3_expanded(csv_entry, candidates)
-        
-        # Record results
-        result = {
-            'csv_title': csv_title,
-            'csv_type': csv_entry.get('type', ''),
-            'candidates_checked': len(candidates),
-            'approach_1': {'match': match1['title'] if match1 else None, 'pass': pass1, 'score': score1},
-            'approach_2': {'match': match2['title'] if match2 else None, 'pass': pass2, 'score': score2},
-            'approach_3': {'match': match3['title'] if match3 else None, 'pass': pass3, 'score': score3},
-        }
-        results.append(result)
-        
-        # Progress
-        if (idx + 1) % max(1, len(test_entries) // 5) == 0:
-            elapsed = time.time() - start_time
-            rate = (idx + 1) / elapsed
-            print(f"   Processed {idx + 1}/{len(test_entries)} ({rate:.1f} entries/sec)")
+    if MATCH_WORKERS > 1:
+        # Ship the DB once per worker; map keeps results in input order
+        with ProcessPoolExecutor(max_workers=MATCH_WORKERS,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(db_entries, anchor_index)) as executor:
+            chunksize = max(1, len(test_entries) // (MATCH_WORKERS * 8))
+            matched = executor.map(_match_one, test_entries, chunksize=chunksize)
+            results = _collect(matched, len(test_entries), start_time)
+    else:
+        matched = (match_entry(e, db_entries, anchor_index) for e in test_entries)
+        results = _collect(matched, len(test_entries), start_time)
     
     total_time = time.time() - start_time
     
@@ -379,28 +516,25 @@ def main():
     print("📊 RESULTS ANALYSIS")
     print("=" * 80)
     
-    # Count matches per approach
-    stats = {
-        'approach_1': {'matches': 0, 'by_pass': defaultdict(int), 'avg_score': []},
-        'approach_2': {'matches': 0, 'by_pass': defaultdict(int), 'avg_score': []},
-        'approach_3': {'matches': 0, 'by_pass': defaultdict(int), 'avg_score': []},
-    }
-    
-    disagreements = []
-    
-    for r in results:
-        for approach in ['approach_1', 'approach_2', 'approach_3']:
-            data = r[approach]
-            if data['match']:
-                stats[approach]['matches'] += 1
-                stats[approach]['by_pass'][data['pass']] += 1
-                stats[approach]['avg_score'].append(data['score'])
-        
-        # Check for disagreements
-        m1, m2, m3 = r['approach_1']['match'], r['approach_2']['match'], r['approach_3']['match']
-        matches = [m for m in [m1, m2, m3] if m]
-        if len(set(matches)) > 1:
-            disagreements.append(r)
+    # Count matches per approach with one column scan each
+    n_results = len(results)
+    stats = {}
+    for name, (m_field, p_field, s_field) in (('approach_1', ('m1', 'p1', 's1')),
+                                              ('approach_2', ('m2', 'p2', 's2')),
+                                              ('approach_3', ('m3', 'p3', 's3'))):
+        matched = np.fromiter((bool(getattr(r, m_field)) for r in results), dtype=bool, count=n_results)
+        passes = np.fromiter((getattr(r, p_field) for r in results), dtype=np.int64, count=n_results)[matched]
+        scores = np.fromiter((getattr(r, s_field) for r in results), dtype=np.float64, count=n_results)[matched]
+        # Pass counts keyed in order of first appearance, as the report lists them
+        values, first_seen, counts = np.unique(passes, return_index=True, return_counts=True)
+        stats[name] = {
+            'matches': int(matched.sum()),
+            'by_pass': {int(values[i]): int(counts[i]) for i in np.argsort(first_seen)},
+            'avg_score': float(scores.mean()) if scores.size else 0,
+        }
+    
+    # Check for disagreements
+    disagreements = [r for r in results if len({m for m in (r.m1, r.m2, r.m3) if m}) > 1]
     
     # Print stats
     print(f"\nTiming: {total_time:.2f}s total ({total_time/len(test_entries):.3f}s per entry)")
@@ -409,22 +543,21 @@ def main():
     for name, data in stats.items():
         matches = data['matches']
         rate = matches / len(test_entries) * 100
-        avg = sum(data['avg_score']) / len(data['avg_score']) if data['avg_score'] else 0
-        print(f"{name:<15} {matches:>10} {rate:>7.1f}% {avg:>9.3f}")
+        print(f"{name:<15} {matches:>10} {rate:>7.1f}% {data['avg_score']:>9.3f}")
     
     print(f"\nPass distribution:")
     for name, data in stats.items():
-        print(f"  {name}: {dict(data['by_pass'])}")
+        print(f"  {name}: {data['by_pass']}")
     
     # Show sample matches
     print("\n" + "-" * 80)
     print("🔍 SAMPLE MATCHES (first 5):")
     print("-" * 80)
     for r in results[:5]:
-        print(f"\nCSV: '{r['csv_title']}'")
-        print(f"  A1 (Token):  {r['approach_1']['match'] or 'NO MATCH'} (p{r['approach_1']['pass']}, {r['approach_1']['score']:.2f})")
-        print(f"  A2 (Anchor): {r['approach_2']['match'] or 'NO MATCH'} (p{r['approach_2']['pass']}, {r['approach_2']['score']:.2f})")
-        print(f"  A3 (Expand): {r['approach_3']['match'] or 'NO MATCH'} (p{r['approach_3']['pass']}, {r['approach_3']['score']:.2f})")
+        print(f"\nCSV: '{r.csv_title}'")
+        print(f"  A1 (Token):  {r.m1 or 'NO MATCH'} (p{r.p1}, {r.s1:.2f})")
+        print(f"  A2 (Anchor): {r.m2 or 'NO MATCH'} (p{r.p2}, {r.s2:.2f})")
+        print(f"  A3 (Expand): {r.m3 or 'NO MATCH'} (p{r.p3}, {r.s3:.2f})")
     
     # Show disagreements
     if disagreements:
@@ -432,26 +565,23 @@ def main():
         print(f"⚠️  DISAGREEMENTS ({len(disagreements)} cases - approaches differ):")
         print("-" * 80)
         for r in disagreements[:3]:
-            print(f"\nCSV: '{r['csv_title']}'")
-            print(f"  A1: {r['approach_1']['match']}")
-            print(f"  A2: {r['approach_2']['match']}")
-            print(f"  A3: {r['approach_3']['match']}")
+            print(f"\nCSV: '{r.csv_title}'")
+            print(f"  A1: {r.m1}")
+            print(f"  A2: {r.m2}")
+            print(f"  A3: {r.m3}")
     
     # Export results
     output_file = 'matching_results.csv'
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(['csv_title', 'a1_match', 'a1_pass', 'a1_score', 
                         'a2_match', 'a2_pass', 'a2_score',
                         'a3_match', 'a3_pass', 'a3_score', 'candidates'])
-        for r in results:
-            writer.writerow([
-                r['csv_title'],
-                r['approach_1']['match'], r['approach_1']['pass'], f"{r['approach_1']['score']:.3f}",
-                r['approach_2']['match'], r['approach_2']['pass'], f"{r['approach_2']['score']:.3f}",
-                r['approach_3']['match'], r['approach_3']['pass'], f"{r['approach_3']['score']:.3f}",
-                r['candidates_checked']
-            ])
+        writer.writerows([
+            [r.csv_title, r.m1, r.p1, f"{r.s1:.3f}", r.m2, r.p2, f"{r.s2:.3f}",
+             r.m3, r.p3, f"{r.s3:.3f}", r.n_cands]
+            for r in results
+        ])
     print(f"\n💾 Detailed results exported to: {output_file}")
     
     # Recommendation
@@ -12,33 +12,37 @@ corrections = {
     "K": "https://anilist.co/anime/14467"
 }
 
+# Keep only (title, AniList URL) per row and index row numbers by title in the same pass
 rows = []
+rows_by_title = {}
 with open('animelist_enriched4.csv', 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        rows.append(row)
+    reader = csv.reader(f)
+    header = next(reader)
+    i_title, i_url = header.index('Title'), header.index('AniList_URL')
+    for i, row in enumerate(reader, 1):
+        rows.append((row[i_title], row[i_url]))
+        rows_by_title.setdefault(row[i_title], []).append(i)
 
 print("=== CURRENT STATUS OF ANIME I FOUND ===\n")
-for i, row in enumerate(rows, 1):
-    title = row['Title']
-    if title in corrections:
-        print(f"Row {i}: {title}")
-        print(f"  Current AniList_URL: {row['AniList_URL']}")
-        print(f"  Should be: {corrections[title]}")
-        print()
+for i in sorted(i for title in corrections for i in rows_by_title.get(title, ())):
+    title, url = rows[i - 1]
+    print(f"Row {i}: {title}")
+    print(f"  Current AniList_URL: {url}")
+    print(f"  Should be: {corrections[title]}")
+    print()
 
 # Check row 178 specifically
 print("=== ROW 178 (where I incorrectly put K's URL) ===")
-print(f"Title: {rows[177]['Title']}")
-print(f"Current AniList_URL: {rows[177]['AniList_URL']}")
+print(f"Title: {rows[177][0]}")
+print(f"Current AniList_URL: {rows[177][1]}")
 print()
 
 # Check if there are any other rows with 14467
 print("=== CHECKING FOR OTHER INCORRECT 14467 ENTRIES ===")
 found = False
-for i, row in enumerate(rows, 1):
-    if '14467' in str(row.get('AniList_URL', '')):
-        print(f"Row {i}: {row['Title']} has AniList_URL with 14467")
+for i, (title, url) in enumerate(rows, 1):
+    if '14467' in url:
+        print(f"Row {i}: {title} has AniList_URL with 14467")
         found = True
 if not found:
     print("No other entries with 14467 found")